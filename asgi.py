@@ -0,0 +1,13 @@
+"""ASGI entry point for serving the Flask app under an ASGI server.
+
+The transaction store lives in process memory, so run a single worker
+process and let the server's thread pool provide request concurrency:
+
+    uvicorn asgi:application --loop uvloop
+"""
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app
+
+application = WsgiToAsgi(app)
@@ -1,3 +1,7 @@
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
 import pytest
 
 import app as app_module
@@ -5,12 +9,7 @@ import app as app_module
 
 @pytest.fixture(autouse=True)
 def reset_state():
-    app_module.transactions.clear()
-    app_module.product_totals.clear()
-    app_module.customer_totals.clear()
-    app_module.product_index.clear()
-    app_module.customer_index.clear()
-    app_module.next_id = 1
+    app_module.reset_store()
     yield
 
 
@@ -107,6 +106,334 @@ def test_filters_and_pagination(client):
     assert payload["count"] == 1
     assert payload["transactions"][0]["customer_id"] == "C2"
 
+    both = client.get("/transactions?product_id=P1&customer_id=C2").get_json()
+    assert [tx["id"] for tx in both["transactions"]] == [2]
+
     paged = client.get("/transactions?limit=1&offset=1")
     assert paged.get_json()["count"] == 3
     assert len(paged.get_json()["transactions"]) == 1
+
+    client.delete("/transactions/1")
+    paged = client.get("/transactions?limit=5&offset=1").get_json()
+    assert paged["count"] == 2
+    assert [tx["id"] for tx in paged["transactions"]] == [3]
+
+
+def test_update_and_delete_refresh_filters(client):
+    for price in (5.0, 15.0):
+        client.post("/transactions", json={
+            "product_id": "P1",
+            "customer_id": "C1",
+            "quantity": 1,
+            "price": price,
+            "timestamp": "2026-02-05T12:00:00+00:00",
+        })
+
+    assert client.get("/transactions/1").get_json()["transaction"]["total"] == 5.0
+    client.put("/transactions/1", json={"product_id": "P2", "quantity": 4})
+    assert client.get("/transactions/1").get_json()["transaction"]["total"] == 20.0
+    moved = client.get("/transactions?product_id=P2&min_total=20").get_json()
+    assert moved["count"] == 1
+    assert moved["transactions"][0]["id"] == 1
+
+    client.delete("/transactions/2")
+    assert client.get("/transactions?product_id=P1").get_json()["count"] == 0
+    assert client.get("/transactions").get_json()["count"] == 1
+
+    products = client.get("/analytics/total-sales-per-product").get_json()["products"]
+    assert products == [{"product_id": "P2", "total_sales": 20.0}]
+
+
+def test_date_range_filter(client):
+    for day, price in ((3, 5.0), (5, 15.0), (7, 25.0)):
+        client.post("/transactions", json={
+            "product_id": "P1",
+            "customer_id": "C1",
+            "quantity": 1,
+            "price": price,
+            "timestamp": f"2026-02-0{day}T12:00:00+00:00",
+        })
+    client.delete("/transactions/2")
+
+    response = client.get("/transactions?start_date=2026-02-04T00:00:00%2B00:00")
+    assert [tx["id"] for tx in response.get_json()["transactions"]] == [3]
+
+    response = client.get("/transactions?start_date=2026-02-03T12:00:00%2B00:00&end_date=2026-02-07T12:00:00%2B00:00")
+    assert [tx["id"] for tx in response.get_json()["transactions"]] == [1, 3]
+
+
+def test_analytics_cache_invalidated_by_writes(client):
+    payload = {"product_id": "P1", "customer_id": "C1", "quantity": 1, "price": 10.0}
+    client.post("/transactions", json=payload)
+    assert client.get("/analytics/total-sales-per-product").get_json()["count"] == 1
+    assert client.get("/analytics/top-customers?limit=5").get_json()["count"] == 1
+
+    client.post("/transactions", json={**payload, "product_id": "P2", "customer_id": "C2"})
+    assert client.get("/analytics/total-sales-per-product").get_json()["count"] == 2
+    assert client.get("/analytics/top-customers?limit=5").get_json()["count"] == 2
+
+    client.delete("/transactions/1")
+    products = client.get("/analytics/total-sales-per-product").get_json()["products"]
+    assert [item["product_id"] for item in products] == ["P2"]
+
+
+def test_concurrent_creates_keep_ids_and_totals(client):
+    def worker():
+        with app_module.app.test_client() as thread_client:
+            for _ in range(25):
+                thread_client.post("/transactions", json={
+                    "product_id": "P1",
+                    "customer_id": "C1",
+                    "quantity": 1,
+                    "price": 2.0,
+                })
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    listing = client.get("/transactions").get_json()
+    assert listing["count"] == 200
+    assert sorted(tx["id"] for tx in listing["transactions"]) == list(range(1, 201))
+    top = client.get("/analytics/top-customers?limit=1").get_json()["customers"][0]
+    assert top["total_sales"] == pytest.approx(400.0)
+
+
+def test_benchmark_endpoint(client):
+    response = client.get("/analytics/benchmark?records=1000&rounds=2")
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["records"] == 1000
+    assert payload["query_rounds"] == 2
+
+    assert client.get("/analytics/benchmark?records=0").status_code == 400
+
+
+@pytest.mark.parametrize("record_count", [0, 1, 997, 10_007])
+def test_aggregate_matches_bincount(record_count):
+    rng = np.random.default_rng(record_count)
+    n_products, n_customers = 13, 29
+    product_codes = rng.integers(0, n_products, size=record_count, dtype=np.int32)
+    customer_codes = rng.integers(0, n_customers, size=record_count, dtype=np.int32)
+    quantities = rng.integers(1, 6, size=record_count, dtype=np.int64)
+    prices = np.round(rng.uniform(5, 250, size=record_count), 2)
+    totals = quantities * prices
+    expected = (
+        np.bincount(product_codes, weights=totals, minlength=n_products),
+        np.bincount(customer_codes, weights=totals, minlength=n_customers),
+    )
+
+    columns_in = (product_codes, customer_codes, quantities, prices, n_products, n_customers)
+    results = [app_module._aggregate(*columns_in)]
+    if app_module.njit is not None:
+        # Chunk counts that do not divide the row count exercise the ragged last chunk.
+        results += [app_module._aggregate_kernel(*columns_in, n_chunks) for n_chunks in (1, 3, 7, 64)]
+    for product_totals, customer_totals in results:
+        np.testing.assert_allclose(product_totals, expected[0])
+        np.testing.assert_allclose(customer_totals, expected[1])
+
+def test_validation_errors(client):
+    missing = client.post("/transactions", json={"product_id": "P1"})
+    assert missing.status_code == 400
+    assert missing.get_json()["errors"] == ["customer_id is required", "quantity is required", "price is required"]
+
+    bad_quantity = client.post("/transactions", json={
+        "product_id": "P1",
+        "customer_id": "C1",
+        "quantity": 0,
+        "price": 5.0,
+    })
+    assert bad_quantity.get_json()["errors"] == ["quantity must be a positive integer"]
+
+    every_error = client.post("/transactions", json={"product_id": "P1", "quantity": "abc", "price": 1})
+    assert every_error.get_json()["errors"] == ["customer_id is required", "quantity must be a positive integer"]
+
+    two_ranges = client.post("/transactions", json={
+        "product_id": "P1",
+        "customer_id": "C1",
+        "quantity": 0,
+        "price": -1,
+    })
+    assert two_ranges.get_json()["errors"] == [
+        "quantity must be a positive integer",
+        "price must be a non-negative number",
+    ]
+
+    empty_ids = client.post("/transactions", json={"product_id": " ", "customer_id": "", "quantity": 1, "price": 1})
+    assert empty_ids.get_json()["errors"] == ["product_id cannot be empty", "customer_id cannot be empty"]
+
+    not_object = client.post("/transactions", json=[1, 2])
+    assert not_object.get_json()["errors"] == ["request body must be a JSON object"]
+
+    named = client.post("/transactions", json={
+        "product_id": "P1",
+        "product_name": 42,
+        "customer_id": "C1",
+        "quantity": 1,
+        "price": 1,
+    })
+    assert named.get_json()["transaction"]["product_name"] == "42"
+
+
+def test_rejects_non_finite_price_and_total(client):
+    base = {"product_id": "P1", "customer_id": "C1", "quantity": 2}
+    for price in ("inf", "nan", "-inf"):
+        response = client.post("/transactions", json={**base, "price": price})
+        assert response.status_code == 400
+        assert response.get_json()["errors"] == ["price must be a non-negative number"]
+
+    overflow = client.post("/transactions", json={**base, "price": 1e308})
+    assert overflow.status_code == 400
+    assert overflow.get_json()["errors"] == ["quantity * price is too large"]
+
+    created = client.post("/transactions", json={**base, "quantity": 1, "price": 1e308}).get_json()["transaction"]
+    update = client.put(f"/transactions/{created['id']}", json={"quantity": 2})
+    assert update.status_code == 400
+    assert update.get_json()["errors"] == ["quantity * price is too large"]
+    assert client.get(f"/transactions/{created['id']}").get_json()["transaction"]["quantity"] == 1
+
+    coerced = client.post("/transactions", json={
+        "product_id": 7,
+        "customer_id": " C1 ",
+        "quantity": "2",
+        "price": "2.5",
+    })
+    assert coerced.status_code == 201
+    tx = coerced.get_json()["transaction"]
+    assert (tx["product_id"], tx["customer_id"], tx["total"]) == ("7", "C1", 5.0)
+
+
+def test_top_customers_reranked_on_update(client):
+    client.post("/transactions", json={"product_id": "P1", "customer_id": "C1", "quantity": 1, "price": 10.0})
+    client.post("/transactions", json={"product_id": "P1", "customer_id": "C2", "quantity": 1, "price": 20.0})
+    top = client.get("/analytics/top-customers?limit=2").get_json()["customers"]
+    assert [item["customer_id"] for item in top] == ["C2", "C1"]
+
+    client.put("/transactions/1", json={"quantity": 3})
+    top = client.get("/analytics/top-customers?limit=2").get_json()["customers"]
+    assert [(item["customer_id"], item["total_sales"]) for item in top] == [("C1", 30.0), ("C2", 20.0)]
+
+
+def test_overflowing_totals_never_reach_the_ranking(client, monkeypatch):
+    for quantity in (2, 3):
+        response = client.post("/transactions", json={
+            "product_id": "P1", "customer_id": "C1", "quantity": quantity, "price": 1e308,
+        })
+        assert response.status_code == 400
+    for index in range(3):
+        client.post("/transactions", json={
+            "product_id": "P1", "customer_id": f"D{index}", "quantity": 1, "price": 10.0 * (index + 1),
+        })
+
+    # With request validation bypassed, the column store still refuses an inf total.
+    monkeypatch.setattr(app_module, "_total_is_finite", lambda quantity, price: True)
+    with pytest.raises(OverflowError):
+        client.post("/transactions", json={"product_id": "P1", "customer_id": "C1", "quantity": 2, "price": 1e308})
+
+    assert client.delete("/transactions/2").status_code == 200
+    top = client.get("/analytics/top-customers?limit=5").get_json()["customers"]
+    assert [(item["customer_id"], item["total_sales"]) for item in top] == [("D2", 30.0), ("D0", 10.0)]
+
+
+def test_failed_unindex_leaves_store_unchanged(client, monkeypatch):
+    client.post("/transactions", json={"product_id": "P1", "customer_id": "C1", "quantity": 1, "price": 5.0})
+    products = client.get("/analytics/total-sales-per-product").get_json()
+
+    def failing_remove(key):
+        raise ValueError(f"{key} not in list")
+
+    monkeypatch.setattr(app_module.customer_ranking, "remove", failing_remove)
+    with pytest.raises(ValueError):
+        client.delete("/transactions/1")
+    with pytest.raises(ValueError):
+        client.put("/transactions/1", json={"quantity": 2})
+    monkeypatch.undo()
+
+    assert client.get("/transactions/1").get_json()["transaction"]["quantity"] == 1
+    assert client.get("/transactions?customer_id=C1").get_json()["count"] == 1
+    assert client.get("/analytics/total-sales-per-product").get_json() == products
+    assert client.delete("/transactions/1").status_code == 200
+    assert client.get("/analytics/top-customers").get_json()["customers"] == []
+
+def test_rejects_values_outside_column_range(client):
+    base = {"product_id": "P1", "customer_id": "C1", "quantity": 1, "price": 5.0}
+    for timestamp in ("2300-01-01T00:00:00+00:00", "1600-01-01T00:00:00+00:00"):
+        response = client.post("/transactions", json={**base, "timestamp": timestamp})
+        assert response.status_code == 400
+        assert response.get_json()["errors"][0].startswith("timestamp must be between")
+
+    response = client.post("/transactions", json={**base, "quantity": 2**63})
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == ["quantity must be a positive integer"]
+
+    client.post("/transactions", json=base)
+    wide = client.get("/transactions?start_date=1600-01-01T00:00:00%2B00:00&end_date=2300-01-01T00:00:00%2B00:00")
+    assert wide.status_code == 200
+    assert wide.get_json()["count"] == 1
+
+
+def test_failed_index_leaves_store_unchanged(client, monkeypatch):
+    # Let the timestamp pass validation so the column store itself rejects it.
+    far_future = datetime.max.replace(tzinfo=timezone.utc)
+    monkeypatch.setattr(app_module, "_MAX_TIMESTAMP", far_future)
+    base = {"product_id": "P1", "customer_id": "C1", "quantity": 1, "price": 5.0}
+
+    with pytest.raises(OverflowError):
+        client.post("/transactions", json={**base, "timestamp": "2300-01-01T00:00:00+00:00"})
+    assert client.get("/transactions").get_json()["count"] == 0
+    assert client.get("/analytics/total-sales-per-product").get_json()["count"] == 0
+
+    created = client.post("/transactions", json=base).get_json()["transaction"]
+    with pytest.raises(OverflowError):
+        client.put(f"/transactions/{created['id']}", json={"quantity": 3, "timestamp": "2300-01-01T00:00:00+00:00"})
+
+    fetched = client.get(f"/transactions/{created['id']}").get_json()["transaction"]
+    assert (fetched["quantity"], fetched["total"]) == (1, 5.0)
+    assert client.get("/transactions?product_id=P1").get_json()["count"] == 1
+    products = client.get("/analytics/total-sales-per-product").get_json()["products"]
+    assert products == [{"product_id": "P1", "total_sales": 5.0}]
+
+
+def test_analytics_read_during_write_is_not_cached_stale(client, monkeypatch):
+    payload = {"product_id": "P1", "customer_id": "C1", "quantity": 1, "price": 10.0}
+    client.post("/transactions", json=payload)
+    client.get("/analytics/total-sales-per-product")
+
+    readers: list[threading.Thread] = []
+    original_write_row = app_module._write_row
+
+    def write_row_with_concurrent_read(*args):
+        original_write_row(*args)
+        # Fire a read from another thread while this write is half applied.
+        def read():
+            with app_module.app.test_client() as reader:
+                reader.get("/analytics/total-sales-per-product")
+
+        reader_thread = threading.Thread(target=read)
+        reader_thread.start()
+        reader_thread.join(timeout=0.2)
+        readers.append(reader_thread)
+
+    monkeypatch.setattr(app_module, "_write_row", write_row_with_concurrent_read)
+    client.post("/transactions", json={**payload, "price": 5.0})
+    for reader_thread in readers:
+        reader_thread.join()
+
+    products = client.get("/analytics/total-sales-per-product").get_json()["products"]
+    assert products == [{"product_id": "P1", "total_sales": 15.0}]
+
+
+def test_index_keeps_rows_ordered_when_transactions_move(client):
+    for product_id in ("P1", "P2", "P2"):
+        client.post("/transactions", json={"product_id": product_id, "customer_id": "C1", "quantity": 1, "price": 1.0})
+
+    client.put("/transactions/1", json={"product_id": "P2"})
+    moved = client.get("/transactions?product_id=P2").get_json()
+    assert [tx["id"] for tx in moved["transactions"]] == [1, 2, 3]
+
+    client.put("/transactions/2", json={"product_id": "P1"})
+    client.delete("/transactions/3")
+    assert [tx["id"] for tx in client.get("/transactions?product_id=P2").get_json()["transactions"]] == [1]
+    assert [tx["id"] for tx in client.get("/transactions?customer_id=C1").get_json()["transactions"]] == [1, 2]